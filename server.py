@@ -6,15 +6,28 @@ with authentication using proxy_token.
 """
 
 import os
+import re
 import json
+import hmac
+import hashlib
 import logging
-from typing import Optional, Dict, Any
-from urllib.parse import urlparse
-from fastapi import FastAPI, HTTPException, Header, WebSocket, WebSocketDisconnect
+import ssl
+import socket
+import functools
+import ipaddress
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping
+from fastapi import Depends, FastAPI, HTTPException, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.websockets import WebSocketState
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
+from cachetools import TTLCache
+import anyio
 import httpx
+import httpcore
+import msgspec
+import orjson
 import asyncio
 import websockets
 
@@ -26,7 +39,54 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
-app = FastAPI(title="MCP Proxy Server", version="1.0.0")
+app = FastAPI(
+    title="MCP Proxy Server",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
+
+# Reject oversized request bodies before they are read and parsed
+MAX_REQUEST_BYTES = 10 * 1024 * 1024
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware rejecting HTTP request bodies larger than max_body_size with 413
+    
+    Requests declaring a too large Content-Length are rejected before the body is
+    read. Bodies without Content-Length (chunked) are counted while they are received.
+    """
+    
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = JSONResponse({"detail": "Payload too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail="Payload too large")
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=MAX_REQUEST_BYTES)
 
 # Configure CORS
 app.add_middleware(
@@ -41,6 +101,7 @@ app.add_middleware(
 PROXY_TOKEN = os.getenv("PROXY_TOKEN", "")
 if not PROXY_TOKEN:
     logger.warning("PROXY_TOKEN not set in environment variables!")
+PROXY_TOKEN_BYTES = PROXY_TOKEN.encode()
 
 # Security: Allowed URL schemes for MCP servers
 ALLOWED_SCHEMES = {"http", "https", "ws", "wss"}
@@ -52,80 +113,467 @@ BLOCKED_HOSTS = {
     "[::1]",  # IPv6 localhost
 }
 
+# Security: Keywords identifying common internal domains
+INTERNAL_DOMAIN_RE = re.compile(r"(?:internal|local|intranet)")
+
 # Security: Blocked network ranges (private networks)
 def is_private_ip(ip_str: str) -> bool:
     """Check if IP address is in private range"""
     try:
-        import ipaddress
         ip = ipaddress.ip_address(ip_str)
         return ip.is_private or ip.is_loopback or ip.is_link_local
     except ValueError:
         return False
 
+# Security: Resolved addresses per hostname, shared by validation and connection
+DNS_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+# Outbound HTTP client settings (shared connection pool)
+# HTTP/2 is negotiated via ALPN; servers without h2 support fall back to HTTP/1.1
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+MAX_RESPONSE_BYTES = 10 * 1024 * 1024  # Upstream responses larger than 10MB are rejected
+
+
+# Response cache for read-only JSON-RPC methods
+READONLY_METHODS = set(
+    m.strip()
+    for m in os.getenv("READONLY_METHODS", "tools/list,resources/list,prompts/list").split(",")
+    if m.strip()
+)
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_MAX_PARAMS_BYTES = 100 * 1024  # Don't cache requests with params larger than 100KB
+RESPONSE_CACHE: TTLCache = TTLCache(maxsize=CACHE_MAX_SIZE, ttl=CACHE_TTL)
+
+# WebSocket proxy: messages buffered per direction before backpressure applies
+WS_QUEUE_SIZE = 64
+
+# WebSocket proxy: scheme used to reach an MCP server given as an HTTP URL
+WS_SCHEMES = {"http": "ws", "https": "wss"}
+
+# WebSocket proxy: TLS context shared by all wss connections (CA bundle loaded once)
+WS_SSL_CONTEXT = ssl.create_default_context()
+
+# Cache-Control headers for proxy responses. Read-only results depend on the request
+# body and credentials while all share the /proxy URL, so they are private by default
+READONLY_CACHE_CONTROL = os.getenv("READONLY_CACHE_CONTROL", "private, max-age=60")
+NO_STORE_CACHE_CONTROL = "no-store"
+
+# Upstream calls currently in flight for read-only methods, keyed by cache key
+INFLIGHT: Dict[str, asyncio.Future] = {}
+
+
+# Lifecycle events
+@app.on_event("startup")
+async def startup():
+    """Create the shared HTTP client so upstream connections are kept alive"""
+    app.state.http_client = httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        transport=SafeHTTPTransport(http2=HTTP2_ENABLED, limits=HTTP_LIMITS)
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the shared HTTP client"""
+    await app.state.http_client.aclose()
+
+
 # Request Models
-class MCPRequest(BaseModel):
+class MCPRequest(msgspec.Struct):
     """MCP request model"""
     mcp_server_url: str
-    mcp_token: Optional[str] = None
     method: str
+    mcp_token: Optional[str] = None
     params: Optional[Dict[str, Any]] = None
     jsonrpc: str = "2.0"
     id: Optional[int] = 1
 
 
+# OpenAPI request body for /proxy (the body is decoded by msgspec, not FastAPI)
+MCP_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {
+            "schema": msgspec.json.schema(MCPRequest)["$defs"]["MCPRequest"]
+        }
+    }
+}
+
+
+async def parse_mcp_request(http_request: Request) -> MCPRequest:
+    """Decode and validate the request body as an MCPRequest"""
+    try:
+        return msgspec.json.decode(await http_request.body(), type=MCPRequest)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid request body: {str(e)}")
+
+
 # Authentication helper
 def verify_proxy_token(proxy_token: Optional[str]) -> bool:
-    """Verify the proxy token"""
+    """Verify the proxy token (constant-time comparison)"""
     if not PROXY_TOKEN:
         logger.warning("No PROXY_TOKEN configured, allowing all requests")
         return True
-    return proxy_token == PROXY_TOKEN
+    return hmac.compare_digest((proxy_token or "").encode(), PROXY_TOKEN_BYTES)
 
 
 # Security helper
-def validate_url(url: str) -> bool:
+@functools.lru_cache(maxsize=4096)
+def parse_and_validate(url: str) -> Optional[httpx.URL]:
     """
-    Validate URL to prevent SSRF attacks
+    Parse and validate URL to prevent SSRF attacks
     
     Note: This is a proxy server designed to forward requests to external MCP servers.
     URL validation helps prevent access to internal/private networks, but cannot
     completely eliminate SSRF risks. Only allow trusted users to access this proxy.
+    
+    Returns the parsed URL so callers don't need to parse it again, or None if the
+    URL is invalid or blocked. Results are cached per URL since validation only
+    depends on the URL string.
     """
     try:
-        parsed = urlparse(url)
+        parsed = httpx.URL(url)
         
         # Check scheme
         if parsed.scheme not in ALLOWED_SCHEMES:
             logger.warning(f"Blocked URL with invalid scheme: {parsed.scheme}")
-            return False
+            return None
         
-        # Check for blocked hosts
-        hostname = parsed.hostname
+        # Check for blocked hosts (httpx normalizes the host to lowercase)
+        hostname = parsed.host
         if not hostname:
-            return False
-        
-        hostname_lower = hostname.lower()
+            return None
         
         # Check explicit blocked hosts
-        if hostname_lower in BLOCKED_HOSTS:
+        if hostname in BLOCKED_HOSTS:
             logger.warning(f"Blocked access to restricted host: {hostname}")
-            return False
+            return None
         
         # Check if hostname resolves to private IP
         if is_private_ip(hostname):
             logger.warning(f"Blocked access to private IP: {hostname}")
-            return False
+            return None
         
         # Additional check: block common internal domains
-        if any(keyword in hostname_lower for keyword in ["internal", "local", "intranet"]):
+        if INTERNAL_DOMAIN_RE.search(hostname):
             logger.warning(f"Blocked access to internal domain: {hostname}")
-            return False
+            return None
         
-        return True
+        return parsed
         
     except Exception as e:
         logger.error(f"Error validating URL: {str(e)}")
-        return False
+        return None
+
+
+async def resolve_safe(hostname: str) -> List[str]:
+    """
+    Resolve a hostname and check that none of its addresses are private
+    
+    This blocks DNS names pointing at internal networks, which the hostname checks
+    in parse_and_validate cannot catch. Results are cached, and connections are made
+    to the returned addresses so the checked address is the one actually used.
+    
+    Raises:
+        ValueError: If the hostname resolves to a private address
+        OSError: If the hostname cannot be resolved
+    """
+    addresses = DNS_CACHE.get(hostname)
+    if addresses is not None:
+        return addresses
+    
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        hostname, None, type=socket.SOCK_STREAM
+    )
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    
+    for address in addresses:
+        # Strip any IPv6 zone index (e.g. fe80::1%eth0) before checking
+        if is_private_ip(address.split("%", 1)[0]):
+            raise ValueError(f"{hostname} resolves to private address {address}")
+    
+    DNS_CACHE[hostname] = addresses
+    return addresses
+
+
+class SafeNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that only connects to addresses checked by resolve_safe
+    
+    The connection pool still keys connections on the URL's hostname, so TLS
+    verification and connection reuse stay per host. Only the TCP connect is
+    made to the checked addresses, trying each in turn until one succeeds.
+    """
+    
+    def __init__(self, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._backend = backend or httpcore.AnyIOBackend()
+    
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options=None
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await resolve_safe(host)
+        except (ValueError, OSError) as e:
+            raise httpcore.ConnectError(str(e)) from e
+        
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error
+    
+    async def connect_unix_socket(self, path: str, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("Unix sockets are not allowed")
+    
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class SafeHTTPTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport whose connections go through SafeNetworkBackend"""
+    
+    def __init__(
+        self,
+        http2: bool = False,
+        limits: httpx.Limits = HTTP_LIMITS,
+        backend: Optional[httpcore.AsyncNetworkBackend] = None
+    ):
+        # Relies on httpx 0.25 internals: AsyncHTTPTransport has no hook for the
+        # network backend, so the pool it builds is replaced (unused, never
+        # opened) with one that routes connections through SafeNetworkBackend.
+        super().__init__(http2=http2, limits=limits)
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(http2=http2),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=SafeNetworkBackend(backend)
+        )
+
+
+# Cache helpers
+def make_cache_key(request: MCPRequest) -> Optional[str]:
+    """
+    Build a response cache key for a request, or None if it must not be cached
+
+    Only methods listed in READONLY_METHODS are cacheable. The MCP token is part
+    of the key so responses are never shared between different credentials.
+    """
+    if request.method not in READONLY_METHODS:
+        return None
+    
+    # Empty params are not forwarded, so treat them the same as missing params
+    params = orjson.dumps(request.params or None, option=orjson.OPT_SORT_KEYS)
+    if len(params) > CACHE_MAX_PARAMS_BYTES:
+        return None
+    
+    key = hashlib.blake2b(params)
+    for part in (request.mcp_server_url, request.mcp_token or "", request.method):
+        key.update(b"\0" + part.encode())
+    return key.hexdigest()
+
+
+# Upstream helpers
+@functools.lru_cache(maxsize=256)
+def upstream_headers(mcp_token: Optional[str]) -> Mapping[str, str]:
+    """
+    Build the (read-only) headers for requests to an MCP server
+    
+    Cached per MCP token so the common case of repeated requests with the
+    same credentials does not rebuild the headers every time.
+    """
+    headers = {
+        "Content-Type": "application/json"
+    }
+    
+    # Add MCP token if provided
+    if mcp_token:
+        headers["Authorization"] = f"Bearer {mcp_token}"
+    return MappingProxyType(headers)
+
+
+def check_response_size(response: httpx.Response) -> None:
+    """Reject upstream responses declaring a Content-Length over MAX_RESPONSE_BYTES"""
+    content_length = response.headers.get("content-length", "")
+    # A missing or malformed Content-Length is left to the running byte count
+    if content_length.isdigit() and int(content_length) > MAX_RESPONSE_BYTES:
+        raise HTTPException(status_code=502, detail="MCP server response too large")
+
+
+async def iter_response_bytes(response: httpx.Response):
+    """Yield the upstream response body, stopping once it exceeds MAX_RESPONSE_BYTES"""
+    received = 0
+    async for chunk in response.aiter_bytes():
+        received += len(chunk)
+        if received > MAX_RESPONSE_BYTES:
+            raise HTTPException(status_code=502, detail="MCP server response too large")
+        yield chunk
+
+
+async def send_upstream(
+    client: httpx.AsyncClient,
+    url: httpx.URL,
+    json_rpc_request: Dict[str, Any],
+    headers: Mapping[str, str]
+) -> httpx.Response:
+    """
+    Send a JSON-RPC request to the MCP server and return the response unread
+    
+    Raises httpx.HTTPStatusError (with the body read) for error statuses, and
+    HTTPException if the declared body size is too large.
+    """
+    upstream_request = client.build_request(
+        "POST",
+        url,
+        content=orjson.dumps(json_rpc_request),
+        headers=headers
+    )
+    response = await client.send(upstream_request, stream=True)
+    
+    try:
+        if not response.is_success:
+            await response.aread()
+            response.raise_for_status()
+        
+        check_response_size(response)
+    except BaseException:
+        await response.aclose()
+        raise
+    return response
+
+
+async def forward_request(
+    client: httpx.AsyncClient,
+    url: httpx.URL,
+    json_rpc_request: Dict[str, Any],
+    headers: Mapping[str, str],
+    cache_key: Optional[str] = None
+) -> Any:
+    """Send a JSON-RPC request to the MCP server and cache successful read-only results"""
+    response = await send_upstream(client, url, json_rpc_request, headers)
+    try:
+        body = b"".join([chunk async for chunk in iter_response_bytes(response)])
+    finally:
+        await response.aclose()
+    
+    result = orjson.loads(body)
+    
+    # Only successful JSON-RPC results are cached
+    if cache_key is not None and isinstance(result, dict) and "error" not in result:
+        RESPONSE_CACHE[cache_key] = result
+    return result
+
+
+async def stream_upstream(
+    client: httpx.AsyncClient,
+    url: httpx.URL,
+    json_rpc_request: Dict[str, Any],
+    headers: Mapping[str, str]
+) -> StreamingResponse:
+    """
+    Send a JSON-RPC request to the MCP server and stream its response body back
+
+    The body is passed through as-is instead of being decoded and re-encoded.
+    It is only read in full when the MCP server returns an error status.
+    """
+    response = await send_upstream(client, url, json_rpc_request, headers)
+    
+    async def body():
+        # Headers are already sent once streaming starts, so errors can only abort
+        # the connection. The upstream response is closed however the stream ends.
+        try:
+            async for chunk in iter_response_bytes(response):
+                yield chunk
+        except HTTPException as e:
+            logger.error(f"Aborting streamed response: {e.detail}")
+            raise RuntimeError(e.detail) from None
+        finally:
+            with anyio.CancelScope(shield=True):
+                await response.aclose()
+    
+    return StreamingResponse(
+        body(),
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type", "application/json"),
+        headers={"Cache-Control": NO_STORE_CACHE_CONTROL}
+    )
+
+
+def consume_exception(future: asyncio.Future) -> None:
+    """
+    Mark a shared upstream call's exception as retrieved
+    
+    Avoids "Task exception was never retrieved" when every caller awaiting
+    the call was cancelled before it failed.
+    """
+    if not future.cancelled():
+        future.exception()
+
+
+def readonly_response(result: Any, request_id: Optional[int], if_none_match: Optional[str]) -> Response:
+    """
+    Build the response for a read-only method with Cache-Control and ETag headers
+
+    The caller's JSON-RPC id is patched into the result. The ETag is computed
+    without it, so identical results match across requests with different ids.
+    Returns 304 Not Modified when the client already holds the same ETag.
+    JSON-RPC error results are marked as not cacheable.
+    """
+    if not isinstance(result, dict):
+        return Response(
+            content=orjson.dumps(result),
+            media_type="application/json",
+            headers={"Cache-Control": NO_STORE_CACHE_CONTROL}
+        )
+    
+    body = orjson.dumps({**result, "id": request_id})
+    if "error" in result:
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"Cache-Control": NO_STORE_CACHE_CONTROL}
+        )
+    
+    unpatched = orjson.dumps({k: v for k, v in result.items() if k != "id"})
+    etag = f'"{hashlib.blake2b(unpatched).hexdigest()[:16]}"'
+    headers = {"Cache-Control": READONLY_CACHE_CONTROL, "ETag": etag}
+    
+    # "*" is not honoured: for POST it must not produce 304 (RFC 9110)
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags:
+            return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def connect_mcp_websocket(ws_url: str, addresses: List[str], **kwargs):
+    """Open a WebSocket to the MCP server, trying each checked address in turn"""
+    error: Optional[OSError] = None
+    for address in addresses:
+        try:
+            return await websockets.connect(ws_url, host=address, **kwargs)
+        except OSError as e:
+            error = e
+    raise error
 
 
 # Routes
@@ -145,9 +593,10 @@ async def health():
     return {"status": "healthy"}
 
 
-@app.post("/proxy")
+@app.post("/proxy", openapi_extra={"requestBody": MCP_REQUEST_BODY})
 async def proxy_request(
-    request: MCPRequest,
+    http_request: Request,
+    request: MCPRequest = Depends(parse_mcp_request),
     proxy_token: Optional[str] = Header(None, alias="X-Proxy-Token")
 ):
     """
@@ -155,6 +604,7 @@ async def proxy_request(
     
     Args:
         request: MCP request containing server URL, token, method, and params
+        http_request: Incoming HTTP request (used to reach the shared HTTP client)
         proxy_token: Authentication token for the proxy (from header)
     
     Returns:
@@ -166,21 +616,43 @@ async def proxy_request(
         raise HTTPException(status_code=401, detail="Invalid proxy token")
     
     # Validate MCP server URL for security
-    if not validate_url(request.mcp_server_url):
+    target_url = parse_and_validate(request.mcp_server_url)
+    if target_url is None:
         logger.warning(f"Invalid or blocked MCP server URL: {request.mcp_server_url}")
         raise HTTPException(
             status_code=400,
             detail="Invalid MCP server URL: URL scheme must be http/https and cannot target private/internal networks"
         )
     
-    # Prepare the request to the MCP server
-    headers = {
-        "Content-Type": "application/json"
-    }
+    # Serve read-only methods from the response cache when possible
+    cache_key = make_cache_key(request)
+    if cache_key is not None:
+        cached = RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info(f"Cache hit for {request.mcp_server_url}: {request.method}")
+            return readonly_response(
+                cached, request.id, http_request.headers.get("if-none-match")
+            )
     
-    # Add MCP token if provided
-    if request.mcp_token:
-        headers["Authorization"] = f"Bearer {request.mcp_token}"
+    # Resolve the MCP server host and check the addresses it points to.
+    # SafeNetworkBackend enforces this again when connecting (from the DNS cache)
+    try:
+        await resolve_safe(target_url.raw_host.decode("ascii"))
+    except ValueError as e:
+        logger.warning(f"Blocked MCP server URL: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid MCP server URL: URL scheme must be http/https and cannot target private/internal networks"
+        )
+    except OSError as e:
+        logger.error(f"Failed to resolve MCP server host: {str(e)}")
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to resolve MCP server host: {target_url.host}"
+        )
+    
+    # Prepare the request to the MCP server
+    headers = upstream_headers(request.mcp_token)
     
     # Prepare JSON-RPC request
     json_rpc_request = {
@@ -194,25 +666,44 @@ async def proxy_request(
     
     # Forward the request to the MCP server
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        client = http_request.app.state.http_client
+        
+        # Non-cacheable responses are streamed straight through to the client
+        if cache_key is None:
             logger.info(f"Forwarding request to {request.mcp_server_url}: {request.method}")
-            response = await client.post(
-                request.mcp_server_url,
-                json=json_rpc_request,
-                headers=headers
+            return await stream_upstream(
+                client, target_url, json_rpc_request, headers
             )
-            response.raise_for_status()
-            
-            result = response.json()
-            logger.info(f"Received response from MCP server")
-            return result
-            
+        
+        # Coalesce identical concurrent read-only requests into one upstream call
+        inflight = INFLIGHT.get(cache_key)
+        if inflight is None:
+            logger.info(f"Forwarding request to {request.mcp_server_url}: {request.method}")
+            inflight = asyncio.ensure_future(forward_request(
+                client, target_url, json_rpc_request, headers, cache_key
+            ))
+            INFLIGHT[cache_key] = inflight
+            inflight.add_done_callback(lambda _: INFLIGHT.pop(cache_key, None))
+            inflight.add_done_callback(consume_exception)
+        else:
+            logger.info(f"Joining in-flight request to {request.mcp_server_url}: {request.method}")
+        
+        # Shield so a disconnecting client does not cancel the shared call
+        result = await asyncio.shield(inflight)
+        
+        logger.info(f"Received response from MCP server")
+        return readonly_response(
+            result, request.id, http_request.headers.get("if-none-match")
+        )
+        
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error from MCP server: {e.response.status_code}")
         raise HTTPException(
             status_code=e.response.status_code,
             detail=f"MCP server error: {e.response.text}"
         )
+    except HTTPException:
+        raise
     except httpx.RequestError as e:
         logger.error(f"Request error: {str(e)}")
         raise HTTPException(
@@ -251,13 +742,25 @@ async def websocket_proxy(websocket: WebSocket):
         return
     
     # Validate MCP server URL for security
-    if not validate_url(mcp_server_url):
+    parsed_url = parse_and_validate(mcp_server_url)
+    if parsed_url is None:
         logger.warning(f"Invalid or blocked WebSocket MCP server URL: {mcp_server_url}")
         await websocket.close(code=1002, reason="Invalid MCP server URL")
         return
     
-    # Convert http/https to ws/wss
-    ws_url = mcp_server_url.replace("http://", "ws://").replace("https://", "wss://")
+    # Convert http/https to ws/wss, rewriting only the scheme of the parsed URL
+    ws_scheme = WS_SCHEMES.get(parsed_url.scheme, parsed_url.scheme)
+    ws_url = str(parsed_url.copy_with(scheme=ws_scheme))
+    
+    # Resolve the MCP server host (ASCII/IDNA form, as for /proxy) and check
+    # the addresses it points to
+    hostname = parsed_url.raw_host.decode("ascii")
+    try:
+        addresses = await resolve_safe(hostname)
+    except (ValueError, OSError) as e:
+        logger.warning(f"Blocked or unresolvable WebSocket MCP server URL: {str(e)}")
+        await websocket.close(code=1002, reason="Invalid MCP server URL")
+        return
     
     try:
         # Connect to MCP server
@@ -265,31 +768,91 @@ async def websocket_proxy(websocket: WebSocket):
         if mcp_token:
             headers["Authorization"] = f"Bearer {mcp_token}"
         
-        async with websockets.connect(ws_url, extra_headers=headers) as mcp_ws:
-            # Create tasks for bidirectional forwarding
+        # Connect to a checked address; the URL still provides Host and TLS SNI
+        connect_kwargs = {}
+        if ws_scheme == "wss":
+            connect_kwargs["ssl"] = WS_SSL_CONTEXT
+            connect_kwargs["server_hostname"] = hostname
+        
+        mcp_ws = await connect_mcp_websocket(
+            ws_url, addresses, extra_headers=headers, **connect_kwargs
+        )
+        try:
+            # Bounded queues decouple reading from writing and provide backpressure
+            to_mcp: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+            to_client: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+            
+            # Readers push incoming messages onto the queues, ending with None
             async def forward_to_mcp():
                 try:
                     while True:
-                        data = await websocket.receive_text()
-                        await mcp_ws.send(data)
+                        message = await websocket.receive()
+                        if message["type"] == "websocket.disconnect":
+                            raise WebSocketDisconnect(message.get("code", 1000))
+                        # Forward frames as-is, keeping binary frames binary
+                        data = message.get("bytes")
+                        if data is None:
+                            data = message.get("text") or ""
+                        await to_mcp.put(data)
                 except WebSocketDisconnect:
                     logger.info("Client disconnected")
                 except Exception as e:
                     logger.error(f"Error forwarding to MCP: {str(e)}")
+                await to_mcp.put(None)
             
             async def forward_to_client():
                 try:
                     async for message in mcp_ws:
-                        await websocket.send_text(message)
+                        await to_client.put(message)
                 except Exception as e:
                     logger.error(f"Error forwarding to client: {str(e)}")
+                await to_client.put(None)
             
-            # Run both forwarding tasks concurrently
-            await asyncio.gather(
-                forward_to_mcp(),
-                forward_to_client(),
-                return_exceptions=True
-            )
+            async def send_to_client(message):
+                if isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
+            
+            # Writers send queued messages to the peer until the reader is done.
+            # Messages are taken one at a time so at most WS_QUEUE_SIZE are buffered
+            # (get() on a non-empty queue does not suspend, so bursts need no batching).
+            # After a send error they keep draining so the reader never blocks.
+            async def drain(queue: asyncio.Queue, send, target: str):
+                failed = False
+                while (message := await queue.get()) is not None:
+                    if failed:
+                        continue
+                    try:
+                        await send(message)
+                    except Exception as e:
+                        logger.error(f"Error sending to {target}: {str(e)}")
+                        failed = True
+                
+                # One direction is finished; stop the other instead of waiting for it
+                current = asyncio.current_task()
+                for task in tasks:
+                    if task is not current:
+                        task.cancel()
+            
+            # Run both directions concurrently until the first one finishes
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [
+                        tg.create_task(forward_to_mcp()),
+                        tg.create_task(drain(to_mcp, mcp_ws.send, "MCP")),
+                        tg.create_task(forward_to_client()),
+                        tg.create_task(drain(to_client, send_to_client, "client")),
+                    ]
+            except* Exception as eg:
+                for e in eg.exceptions:
+                    logger.error(f"WebSocket forwarding error: {str(e)}")
+            
+            # Close the client connection too if the MCP server ended the session
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await websocket.close()
+        finally:
+            await mcp_ws.close()
     
     except Exception as e:
         logger.error(f"WebSocket proxy error: {str(e)}")
@@ -301,6 +864,15 @@ if __name__ == "__main__":
     
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
+    workers = int(os.getenv("WORKERS", os.cpu_count() or 1))
     
-    logger.info(f"Starting MCP Proxy Server on {host}:{port}")
-    uvicorn.run(app, host=host, port=port)
+    logger.info(f"Starting MCP Proxy Server on {host}:{port} with {workers} worker(s)")
+    # Multiple workers need an import string; "auto" picks uvloop/httptools when installed
+    uvicorn.run(
+        "server:app" if workers > 1 else app,
+        host=host,
+        port=port,
+        workers=workers,
+        loop="auto",
+        http="auto"
+    )
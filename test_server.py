@@ -4,16 +4,60 @@ Integration test for MCP Proxy Server
 This test verifies basic functionality of the proxy server.
 """
 
+import os
+import json
+import socket
 import asyncio
+import threading
+from contextlib import contextmanager
+from unittest import mock
 import httpx
+import httpcore
 import pytest
+import websockets
+from fastapi.testclient import TestClient
 
 # Test configuration
 PROXY_URL = "http://localhost:8000"
 PROXY_TOKEN = "test_token_123"
+MCP_SERVER_URL = "https://mcp.example.com/mcp"
+
+os.environ.setdefault("PROXY_TOKEN", PROXY_TOKEN)
+import server  # noqa: E402
 
 # Note: These tests require the server to be running
 # Start the server with: PROXY_TOKEN=test_token_123 python server.py
+# Tests using proxy_client() run the app in-process instead.
+
+
+def proxy_client(mcp_handler) -> httpx.AsyncClient:
+    """
+    Client for the proxy app running in-process
+
+    Upstream requests are answered by mcp_handler instead of a real MCP server,
+    and mcp.example.com resolves to a public address without a DNS lookup.
+    """
+    server.RESPONSE_CACHE.clear()
+    server.DNS_CACHE["mcp.example.com"] = ["93.184.216.34"]
+    server.app.state.http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(mcp_handler)
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app),
+        base_url="http://proxy",
+    )
+
+
+def echo_mcp_handler(calls: list):
+    """MCP server stub answering every request with its method name"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        body = json.loads(request.content)
+        return httpx.Response(
+            200,
+            json={"jsonrpc": "2.0", "id": body["id"], "result": {"method": body["method"]}},
+        )
+    return handler
 
 
 async def test_health_endpoint():
@@ -66,6 +110,245 @@ async def test_proxy_with_invalid_token():
         assert response.status_code == 401
 
 
+async def test_proxy_payload_too_large():
+    """Test proxy endpoint rejects request bodies over 10MB"""
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{PROXY_URL}/proxy",
+            headers={"X-Proxy-Token": PROXY_TOKEN, "Content-Type": "application/json"},
+            content=b"{" + b" " * (10 * 1024 * 1024) + b"}",
+        )
+        assert response.status_code == 413
+
+
+async def test_proxy_cache_patches_id():
+    """Test repeated tools/list is served from cache with the caller's id"""
+    calls = []
+    async with proxy_client(echo_mcp_handler(calls)) as client:
+        for request_id, params in ((1, None), (2, {})):
+            response = await client.post(
+                "/proxy",
+                headers={"X-Proxy-Token": PROXY_TOKEN},
+                json={
+                    "mcp_server_url": MCP_SERVER_URL,
+                    "method": "tools/list",
+                    "params": params,
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                },
+            )
+            assert response.status_code == 200
+            assert response.json()["id"] == request_id
+            assert response.json()["result"] == {"method": "tools/list"}
+    assert len(calls) == 1
+
+
+async def test_proxy_etag_ignores_id():
+    """Test read-only responses keep the same ETag across ids and honour If-None-Match"""
+    calls = []
+    async with proxy_client(echo_mcp_handler(calls)) as client:
+        etags = []
+        for request_id in (1, 2):
+            response = await client.post(
+                "/proxy",
+                headers={"X-Proxy-Token": PROXY_TOKEN},
+                json={"mcp_server_url": MCP_SERVER_URL, "method": "tools/list", "id": request_id},
+            )
+            assert response.status_code == 200
+            etags.append(response.headers["etag"])
+        assert etags[0] == etags[1]
+        
+        for if_none_match, status_code in ((etags[0], 304), ("*", 200)):
+            response = await client.post(
+                "/proxy",
+                headers={"X-Proxy-Token": PROXY_TOKEN, "If-None-Match": if_none_match},
+                json={"mcp_server_url": MCP_SERVER_URL, "method": "tools/list", "id": 3},
+            )
+            assert response.status_code == status_code
+
+
+async def test_proxy_blocks_host_resolving_to_private_ip():
+    """Test a public hostname resolving to a private address is rejected"""
+    calls = []
+    
+    async def getaddrinfo(host, port, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 0))]
+    
+    server.DNS_CACHE.pop("rebind.example.com", None)
+    async with proxy_client(echo_mcp_handler(calls)) as client:
+        with mock.patch.object(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo):
+            response = await client.post(
+                "/proxy",
+                headers={"X-Proxy-Token": PROXY_TOKEN},
+                json={"mcp_server_url": "https://rebind.example.com/mcp", "method": "tools/call"},
+            )
+    assert response.status_code == 400
+    assert calls == []
+    assert "rebind.example.com" not in server.DNS_CACHE
+
+
+class RecordingBackend(httpcore.AsyncMockBackend):
+    """Mock network backend recording connected addresses and refusing some of them"""
+    
+    def __init__(self, refused=()):
+        super().__init__([b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}"])
+        self.refused = set(refused)
+        self.connected = []
+    
+    async def connect_tcp(self, host, port, *args, **kwargs):
+        self.connected.append(host)
+        if host in self.refused:
+            raise httpcore.ConnectError(f"Connection refused: {host}")
+        return await super().connect_tcp(host, port, *args, **kwargs)
+
+
+async def test_transport_connections_are_per_host():
+    """Test hosts sharing an IP get separate connections, falling back across addresses"""
+    server.DNS_CACHE["a.example.com"] = ["2001:db8::1", "93.184.216.34"]
+    server.DNS_CACHE["b.example.com"] = ["93.184.216.34"]
+    backend = RecordingBackend(refused={"2001:db8::1"})
+    
+    async with httpx.AsyncClient(transport=server.SafeHTTPTransport(backend=backend)) as client:
+        for url in ("https://a.example.com/mcp", "https://b.example.com/mcp"):
+            response = await client.post(url, content=b"{}")
+            assert response.status_code == 200
+    
+    # b.example.com must not reuse the TLS connection opened for a.example.com
+    assert backend.connected == ["2001:db8::1", "93.184.216.34", "93.184.216.34"]
+
+
+async def test_proxy_openapi_request_body():
+    """Test the /proxy request body schema is published in OpenAPI"""
+    async with proxy_client(echo_mcp_handler([])) as client:
+        response = await client.get("/openapi.json")
+        assert response.status_code == 200
+        request_body = response.json()["paths"]["/proxy"]["post"]["requestBody"]
+        schema = request_body["content"]["application/json"]["schema"]
+        assert set(schema["required"]) == {"mcp_server_url", "method"}
+
+
+class TrackedStream(httpx.AsyncByteStream):
+    """Upstream response body recording whether it was closed"""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+    
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+    
+    async def aclose(self):
+        self.closed = True
+
+
+async def test_proxy_oversized_stream_closes_upstream():
+    """Test an oversized chunked upstream body aborts the stream and closes the upstream"""
+    stream = TrackedStream([b"x" * (1024 * 1024)] * 12)
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=stream)
+    
+    async with proxy_client(handler) as client:
+        with pytest.raises(Exception):
+            response = await client.post(
+                "/proxy",
+                headers={"X-Proxy-Token": PROXY_TOKEN},
+                json={"mcp_server_url": MCP_SERVER_URL, "method": "tools/call"},
+            )
+            assert len(response.content) <= server.MAX_RESPONSE_BYTES
+    assert stream.closed
+
+
+async def test_proxy_single_flight():
+    """Test concurrent identical tools/list requests share one upstream call"""
+    calls = []
+    echo = echo_mcp_handler(calls)
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        # Keep the first upstream call in flight until every request has arrived
+        await asyncio.sleep(0.1)
+        return echo(request)
+    
+    async with proxy_client(handler) as client:
+        responses = await asyncio.gather(*(
+            client.post(
+                "/proxy",
+                headers={"X-Proxy-Token": PROXY_TOKEN},
+                json={"mcp_server_url": MCP_SERVER_URL, "method": "tools/list", "id": request_id},
+            )
+            for request_id in range(10)
+        ))
+    assert len(calls) == 1
+    assert [response.json()["id"] for response in responses] == list(range(10))
+    assert server.INFLIGHT == {}
+
+
+@contextmanager
+def ws_mcp_server():
+    """
+    Local WebSocket MCP server stub echoing messages until it receives "bye"
+
+    Yields the proxy /ws URL for it and an event set once the MCP side of the
+    connection has closed.
+    """
+    closed = threading.Event()
+    started = threading.Event()
+    state = {}
+    
+    async def echo(ws):
+        try:
+            async for message in ws:
+                if message == "bye":
+                    await ws.close()
+                    break
+                await ws.send(message)
+        finally:
+            closed.set()
+    
+    async def serve():
+        state["stop"] = asyncio.get_running_loop().create_future()
+        async with websockets.serve(echo, "127.0.0.1", 0) as ws_server:
+            state["port"] = ws_server.sockets[0].getsockname()[1]
+            state["loop"] = asyncio.get_running_loop()
+            started.set()
+            await state["stop"]
+    
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait(5)
+    server.DNS_CACHE["ws.example.com"] = ["127.0.0.1"]
+    try:
+        yield (
+            f"/ws?proxy_token={PROXY_TOKEN}"
+            f"&mcp_server_url=http://ws.example.com:{state['port']}/",
+            closed,
+        )
+    finally:
+        state["loop"].call_soon_threadsafe(state["stop"].set_result, None)
+        thread.join(5)
+
+
+def test_ws_teardown():
+    """Test either side closing the /ws proxy tears down the other side"""
+    with TestClient(server.app) as client:
+        # Client disconnects: the MCP connection is closed
+        with ws_mcp_server() as (url, mcp_closed):
+            with client.websocket_connect(url) as ws:
+                ws.send_text("hello")
+                assert ws.receive_text() == "hello"
+            assert mcp_closed.wait(5)
+        
+        # MCP server closes: the client connection is closed normally
+        with ws_mcp_server() as (url, mcp_closed):
+            with client.websocket_connect(url) as ws:
+                ws.send_text("bye")
+                message = ws.receive()
+                assert message["type"] == "websocket.close"
+                assert message["code"] == 1000
+            assert mcp_closed.wait(5)
+
+
 if __name__ == "__main__":
     print("Running basic integration tests...")
     print("Note: Server must be running with PROXY_TOKEN=test_token_123")
@@ -83,4 +366,31 @@ if __name__ == "__main__":
     asyncio.run(test_proxy_with_invalid_token())
     print("✓ Proxy with invalid token test passed")
     
+    asyncio.run(test_proxy_payload_too_large())
+    print("✓ Proxy payload too large test passed")
+    
+    asyncio.run(test_proxy_cache_patches_id())
+    print("✓ Proxy cache patches id test passed")
+    
+    asyncio.run(test_proxy_etag_ignores_id())
+    print("✓ Proxy ETag ignores id test passed")
+    
+    asyncio.run(test_proxy_blocks_host_resolving_to_private_ip())
+    print("✓ Proxy blocks host resolving to private IP test passed")
+    
+    asyncio.run(test_transport_connections_are_per_host())
+    print("✓ Transport connections are per host test passed")
+    
+    asyncio.run(test_proxy_openapi_request_body())
+    print("✓ Proxy OpenAPI request body test passed")
+    
+    asyncio.run(test_proxy_oversized_stream_closes_upstream())
+    print("✓ Proxy oversized stream closes upstream test passed")
+    
+    asyncio.run(test_proxy_single_flight())
+    print("✓ Proxy single-flight test passed")
+    
+    test_ws_teardown()
+    print("✓ WebSocket teardown test passed")
+    
     print("\nAll tests passed!")